@@ -1,6 +1,5 @@
 import streamlit as st
 from PIL import Image
-import pandas as pd
 import traceback
 
 # 1. Configuration (Must be first)
@@ -11,8 +10,8 @@ st.set_page_config(
 )
 
 # 2. Imports (Components & Services)
-from services.etl import load_combined_data, load_pipeline
-from services.transforms import group_daily_metrics, group_weekly_metrics, group_channel_conversion
+from services.store import get_store
+from services.transforms import compute_views
 from services.metrics import calculate_kpis
 from components.filters import render_filters
 from components.kpi import render_kpi
@@ -43,26 +42,16 @@ st.title('Dashboard - Somos Empleables')
 
 # 5. Main Execution Block
 try:
-    # 5.1 Load Data
-    traffic = load_combined_data().reset_index()
-    pipeline = load_pipeline()
-    
-    # Ensure date formats
-    traffic['Fecha'] = pd.to_datetime(traffic['Fecha'])
-    if 'fecha agenda' in pipeline.columns:
-        pipeline['fecha agenda'] = pd.to_datetime(pipeline['fecha agenda'])
+    # 5.1 Load Data (shared, read-only snapshot: dates already parsed by the store)
+    snapshot = get_store().snapshot
+    traffic = snapshot.traffic
+    pipeline = snapshot.pipeline
 
     # 5.2 Filter Data
-    traffic_f, pipeline_f = render_filters(traffic, pipeline)
+    traffic_f, pipeline_f = render_filters(traffic, pipeline, snapshot.domains)
     
     # 5.3 Transform Data
-    daily_conv, daily_agendas, daily_hired = group_daily_metrics(traffic_f, pipeline_f)
-    if not traffic_f.empty and not pipeline_f.empty:
-        weekly_df = group_weekly_metrics(traffic_f, pipeline_f)
-        channel_df = group_channel_conversion(pipeline_f)
-    else:
-        weekly_df = pd.DataFrame()
-        channel_df = pd.DataFrame()
+    daily_conv, daily_agendas, daily_hired, weekly_df, channel_df = compute_views(traffic_f, pipeline_f, snapshot.conv_channel)
     
     # 5.4 Calculate KPIs
     kpis = calculate_kpis(pipeline_f, daily_conv)
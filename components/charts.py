@@ -2,6 +2,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
+import numpy as np
+
+# Above this many points per trace, line/scatter charts switch to WebGL (scattergl)
+WEBGL_POINT_THRESHOLD = 1000
 
 def aplicarBackgroundChart(fig, color="#ffffff"):
     """
@@ -13,6 +17,32 @@ def aplicarBackgroundChart(fig, color="#ffffff"):
         "font": {"color": "#000000"}
     })
 
+def render_mode(n_points):
+    return 'webgl' if n_points > WEBGL_POINT_THRESHOLD else 'svg'
+
+def compactarPayload(fig):
+    """
+    Codifica los ejes de fecha como arreglos numéricos (ms desde epoch) para que
+    Plotly los envíe como typed arrays en base64 en vez de listas de strings ISO.
+    Los valores numéricos ya se serializan en base64 desde plotly 6.
+    """
+    date_axes = set()
+    for trace in fig.data:
+        for attr, axis_attr in (('x', 'xaxis'), ('y', 'yaxis')):
+            values = getattr(trace, attr, None)
+            if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+                trace[attr] = values.astype('datetime64[ms]').astype('int64').astype('float64')
+                # "x" -> "xaxis", "x2" -> "xaxis2"
+                axis_ref = trace[axis_attr] or attr
+                date_axes.add(axis_ref[0] + 'axis' + axis_ref[1:])
+                if trace.hovertemplate:
+                    trace.hovertemplate = trace.hovertemplate.replace(
+                        '%{' + attr + '}', '%{' + attr + '|%Y-%m-%d}'
+                    )
+    for axis in date_axes:
+        fig.layout[axis].type = 'date'
+    return fig
+
 def plot_funnel(data):
     fig = px.funnel(data, x='number', y='stage')
     return aplicarBackgroundChart(fig)
@@ -22,7 +52,7 @@ def plot_sankey(df_pipeline_filtered):
     sources = df_pipeline_filtered['medio contacto'].unique().tolist()
     professions = df_pipeline_filtered['profesión/formación'].unique().tolist()
     statuses = ['Contratado', 'No Contratado']
-    reasons = df_pipeline_filtered[df_pipeline_filtered['contrata programa'] == 'No']['Motivo por el que no continua'].unique().tolist()
+    reasons = df_pipeline_filtered.loc[df_pipeline_filtered['contrata programa'] == 'No', 'Motivo por el que no continua'].unique().tolist()
     reasons = [r for r in reasons if r != '-']
     
     all_labels = sources + professions + statuses + reasons
@@ -40,8 +70,10 @@ def plot_sankey(df_pipeline_filtered):
         values.append(row['count'])
         
     # 2. Profession -> Status
-    df = df_pipeline_filtered.copy()
-    df['status_label'] = df['contrata programa'].map({'Sí': 'Contratado', 'No': 'No Contratado'})
+    # Only the columns the flows need; assign() builds a new frame, the input is not modified
+    df = df_pipeline_filtered[['profesión/formación', 'Motivo por el que no continua']].assign(
+        status_label=df_pipeline_filtered['contrata programa'].map({'Sí': 'Contratado', 'No': 'No Contratado'})
+    )
     
     flow2 = df.groupby(['profesión/formación', 'status_label']).size().reset_index(name='count')
     for _, row in flow2.iterrows():
@@ -89,14 +121,44 @@ def plot_status_conversion(df):
         x='estado', 
         y='Percentage', 
         color='contrata programa', 
-        text=status_conversion['Percentage'].apply(lambda x: f'{x:.1f}%'),
         title="Distribución Contratados vs No Contratados"
     )
+    fig.update_traces(texttemplate='%{y:.1f}%')
     return aplicarBackgroundChart(fig)
 
 def plot_daily_conversion(df_trafico):
-    fig = px.line(df_trafico, x='Fecha', y='Tasa Conversion', markers=True)
-    return aplicarBackgroundChart(fig)
+    """
+    Daily conversion rate. If the frame carries the snapshot's rolling stats
+    (see services/rolling.py) it also draws the 7d rate and the anomaly band.
+    """
+    fig = px.line(
+        df_trafico, x='Fecha', y='Tasa Conversion', markers=True,
+        render_mode=render_mode(len(df_trafico))
+    )
+    if 'Banda Superior' in df_trafico.columns and not df_trafico.empty:
+        df_sorted = df_trafico.sort_values('Fecha')
+        scatter = go.Scattergl if len(df_sorted) > WEBGL_POINT_THRESHOLD else go.Scatter
+        fig.add_trace(scatter(
+            x=df_sorted['Fecha'].to_numpy(), y=df_sorted['Banda Superior'].to_numpy(),
+            mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(scatter(
+            x=df_sorted['Fecha'].to_numpy(), y=df_sorted['Banda Inferior'].to_numpy(),
+            mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(99,110,250,0.15)',
+            name='Banda normal (28d)', hoverinfo='skip'
+        ))
+        fig.add_trace(scatter(
+            x=df_sorted['Fecha'].to_numpy(), y=df_sorted['Tasa Conversion 7d'].to_numpy(),
+            mode='lines', line=dict(color='#ef553b'), name='Tasa 7d',
+            hovertemplate='%{x}<br>Tasa 7d=%{y:.1f}%<extra></extra>'
+        ))
+        anomalias = df_sorted[df_sorted['Anomalia'].fillna(False).astype(bool)]
+        if not anomalias.empty:
+            fig.add_trace(scatter(
+                x=anomalias['Fecha'].to_numpy(), y=anomalias['Tasa Conversion'].to_numpy(),
+                mode='markers', marker=dict(color='#ef553b', size=10, symbol='x'), name='Anomalía'
+            ))
+    return aplicarBackgroundChart(compactarPayload(fig))
 
 def plot_contact_method(df_pipeline_filtered):
     # 1. Agendados count per medium
@@ -105,8 +167,8 @@ def plot_contact_method(df_pipeline_filtered):
     agendados_by_source['Type'] = 'Agendados'
     
     # 2. Retirados count per medium (where contrata == 'No')
-    retirados_df = df_pipeline_filtered[df_pipeline_filtered['contrata programa'] == 'No']
-    retirados_by_source = retirados_df['medio contacto'].value_counts().reset_index()
+    retirados = df_pipeline_filtered.loc[df_pipeline_filtered['contrata programa'] == 'No', 'medio contacto']
+    retirados_by_source = retirados.value_counts().reset_index()
     retirados_by_source.columns = ['Medio', 'Count']
     retirados_by_source['Type'] = 'Retirados'
     
@@ -115,7 +177,7 @@ def plot_contact_method(df_pipeline_filtered):
     
     # 4. Plot
     fig = px.bar(comparison_df, x='Medio', y='Count', color='Type', barmode='group')
-    return aplicarBackgroundChart(fig)
+    return aplicarBackgroundChart(compactarPayload(fig))
 
 def plot_weekly_evolution(weekly_df):
     """
@@ -134,22 +196,44 @@ def plot_weekly_evolution(weekly_df):
         title='Evolución Semanal de Operación',
         labels={'Fecha': 'Semana', 'Cantidad': 'Volumen'}
     )
-    return aplicarBackgroundChart(fig)
+    return aplicarBackgroundChart(compactarPayload(fig))
 
 def plot_channel_conversion(channel_summary):
     """
     Plots conversion rate by channel.
     """
-    # Create text labels
-    channel_summary['Label'] = channel_summary.apply(lambda x: f"{x['Tasa Cierre']:.1f}% ({x['Contratados']}/{x['Agendados']})", axis=1)
-    
     fig = px.bar(
         channel_summary,
         x='medio contacto',
         y='Tasa Cierre',
-        text='Label',
+        custom_data=['Contratados', 'Agendados'],
+        # Conversaciones por canal solo existen si se procesaron los logs de eventos
+        hover_data=[c for c in ['Conversaciones', 'Tasa Conversion'] if c in channel_summary.columns],
         title='Tasa de Cierre por Medio de Contacto (Agendados → Contratados)',
         labels={'medio contacto': 'Canal', 'Tasa Cierre': 'Tasa Cierre (%)'}
     )
-    fig.update_traces(textposition='outside')
+    # Text labels built client-side from a template (no per-row strings in the payload)
+    fig.update_traces(texttemplate='%{y:.1f}% (%{customdata[0]}/%{customdata[1]})', textposition='outside')
     return aplicarBackgroundChart(fig)
+
+def build_figures(traffic_f, pipeline_f, weekly_df, channel_df, kpis):
+    """
+    Builds every dashboard figure for one filter selection (used by the batch export).
+    Keys match the chart keys in app.py; charts without data are skipped as in the app.
+    """
+    funnel_data = dict(
+        number=[kpis['total_conv_val'], kpis['total_agendados_val'], kpis['total_contratados_val']],
+        stage=["Conversaciones", "Agendados", "Contratados"]
+    )
+    figures = {}
+    if not weekly_df.empty:
+        figures['weekly_evo'] = plot_weekly_evolution(weekly_df)
+    if not channel_df.empty:
+        figures['channel_eff'] = plot_channel_conversion(channel_df)
+    figures['gender_dist'] = plot_gender_dist(pipeline_f)
+    figures['status_conv'] = plot_status_conversion(pipeline_f)
+    figures['contact_vol'] = plot_contact_method(pipeline_f)
+    figures['funnel_macro'] = plot_funnel(funnel_data)
+    figures['sankey_flow'] = plot_sankey(pipeline_f)
+    figures['daily_conv_rate'] = plot_daily_conversion(traffic_f)
+    return figures
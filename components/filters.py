@@ -1,11 +1,17 @@
 import streamlit as st
 import pandas as pd
+from services.domains import build_domain_index
+from services.transforms import date_range_bounds, filter_data
 
-def render_filters(traffic, pipeline):
+def render_filters(traffic, pipeline, domains=None):
     """
     Renders the sidebar filters and returns the filtered dataframes.
     Arguments renamed to generic 'traffic' and 'pipeline'.
+    'domains' is the snapshot's precomputed DomainIndex (built here if not given).
     """
+    if domains is None:
+        domains = build_domain_index(traffic, pipeline)
+
     st.sidebar.header("Filtros")
     
     # 1. Time Filter
@@ -13,8 +19,7 @@ def render_filters(traffic, pipeline):
     # time_filter = st.sidebar.radio("Seleccionar Periodo", ["Todo", "Esta Semana", "Este Mes", "Personalizado"])
     time_filter = st.sidebar.radio("Seleccionar Periodo", ["Todo", "Personalizado"]) # Temporarily hidden Week/Month
     
-    start_date = traffic['Fecha'].min()
-    end_date = traffic['Fecha'].max()
+    start_date, end_date = domains.date_bounds
     
     if time_filter == "Esta Semana":
         today = pd.Timestamp.now().normalize()
@@ -32,41 +37,24 @@ def render_filters(traffic, pipeline):
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
         
-    # Filter DataFrames by Date - using Timestamp comparison to include full end_date
-    start_ts = pd.to_datetime(start_date).normalize()
-    # Set end_ts to the very end of the end_date (23:59:59.999999)
-    end_ts = pd.to_datetime(end_date).normalize() + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
-    
-    # Filter Traffic
-    traffic_f = traffic[(traffic['Fecha'] >= start_ts) & (traffic['Fecha'] <= end_ts)]
-    # Sanear columna fecha agenda (si no lo hiciste en ETL)
-    pipeline['fecha agenda'] = pd.to_datetime(pipeline['fecha agenda'], errors='coerce')
-
-    # Filtrado seguro: Si tiene fecha agenda -> filtra por fecha. Si NO la tiene (NaT) -> se mantiene.
-    pipeline_f = pipeline[
-        pipeline['fecha agenda'].isna() |
-        ((pipeline['fecha agenda'] >= start_ts) & (pipeline['fecha agenda'] <= end_ts))
-    ]
+    # Date range (full end_date included)
+    start_ts, end_ts = date_range_bounds(start_date, end_date)
     
     # 2. Employment Status Filter
     st.sidebar.subheader("Perfil")
-    # IMPORTANT: Los valores del sidebar deben venir del pipeline_f filtrado por fecha
-    all_statuses = pipeline_f['estado'].dropna().unique().tolist()
+    # IMPORTANT: Los valores del sidebar deben venir del rango de fechas seleccionado (índice precalculado)
+    all_statuses = domains.options('estado', start_ts, end_ts)
     sel_statuses = st.sidebar.multiselect("Estado Laboral", all_statuses, default=all_statuses)
     
     # 3. Gender Filter
-    all_genders = pipeline_f['Genero'].dropna().unique().tolist()
+    all_genders = domains.options('Genero', start_ts, end_ts)
     sel_genders = st.sidebar.multiselect("Género", all_genders, default=all_genders)
     
     # 4. Contract Status Filter
-    all_contracts = pipeline_f['contrata programa'].dropna().unique().tolist()
+    all_contracts = domains.options('contrata programa', start_ts, end_ts)
     sel_contracts = st.sidebar.multiselect("Contratado", all_contracts, default=all_contracts)
     
-    # Apply Attribute Filters
-    pipeline_f = pipeline_f[
-        (pipeline_f['estado'].isin(sel_statuses)) &
-        (pipeline_f['Genero'].isin(sel_genders)) &
-        (pipeline_f['contrata programa'].isin(sel_contracts))
-    ]
+    # Apply Date + Attribute Filters in one pass
+    traffic_f, pipeline_f = filter_data(traffic, pipeline, start_ts, end_ts, sel_statuses, sel_genders, sel_contracts)
     
     return traffic_f, pipeline_f
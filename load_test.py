@@ -0,0 +1,355 @@
+"""
+Offline load test for app.py using Streamlit's AppTest.
+
+Simulates many concurrent sessions that click the sidebar filters at random
+against synthetic datasets of several sizes, and reports per-rerun latency
+percentiles, throughput and process RSS.
+
+Usage:
+    python load_test.py --sizes 1000 10000 100000 --sessions 50 --reruns 10 --out load_report.json
+
+Each dataset size runs in its own process so the shared data store and the
+RSS figures don't leak between sizes.
+
+With --memory-check it instead measures the peak Python allocation of one
+rerun's data path (filters, transforms, KPIs, figures) with tracemalloc, for
+the full range and for a filtered selection, and fails (exit code 1) if either
+exceeds MAX_PEAK_MULTIPLE x the snapshot size.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, 'app.py')
+
+ESTADOS = ['Empleado', 'Desempleado', 'Estudiante', 'Independiente']
+MEDIOS = ['CTA', 'Referido', 'Lead Magnet', 'SDR', 'Instagram']
+PROFESIONES = ['Ingeniero Comercial', 'Ingeniero en Gestión Informática', 'Técnico electricidad',
+               'Psicóloga', 'Abogada', 'Analista de datos', 'Contador Auditor']
+MOTIVOS = ['Precio', 'No responde', 'Tiempo', 'Encontró trabajo']
+
+# Memory check: per-rerun peak allocation allowed, relative to the shared snapshot.
+# A rerun that copies the whole snapshot on top of its normal work exceeds 1x.
+MAX_PEAK_MULTIPLE = 1.0
+# Fixed allowance for figure objects and JSON payloads on tiny datasets
+PEAK_FLOOR_MB = 8
+
+def generate_dataset(data_dir, n_leads, seed=0):
+    """
+    Writes synthetic conversaciones_completo.csv and pipeline_completo.csv with
+    the same schema as the ETL output. History length grows with the lead count
+    (about 20 agendas per business day).
+    """
+    rng = np.random.default_rng(seed)
+    n_days = max(30, n_leads // 20)
+    days = pd.bdate_range('2025-01-06', periods=n_days)
+
+    conv = pd.DataFrame({
+        'Fecha': days.strftime('%Y-%m-%d'),
+        'Conversaciones Activas': rng.integers(10, 60, n_days),
+    })
+
+    fecha_agenda = days[rng.integers(0, n_days, n_leads)]
+    hired = rng.random(n_leads) < 0.3
+    dias_cierre = np.where(hired, rng.integers(0, 15, n_leads), -1)
+    ingreso = fecha_agenda + pd.to_timedelta(np.maximum(dias_cierre, 0), unit='D')
+    profesion = rng.choice(PROFESIONES, n_leads)
+    pipeline = pd.DataFrame({
+        'usuario': [f'Lead {i}' for i in range(n_leads)],
+        'fecha agenda': fecha_agenda.strftime('%Y-%m-%d'),
+        'estado': rng.choice(ESTADOS, n_leads),
+        'medio contacto': rng.choice(MEDIOS, n_leads),
+        'profesión/formación': profesion,
+        'contrata programa': np.where(hired, 'Sí', 'No'),
+        'Fecha Ingreso': np.where(hired, ingreso.strftime('%d/%m/%Y'), None),
+        'Motivo por el que no continua': np.where(hired, '-', rng.choice(MOTIVOS, n_leads)),
+        'Genero': np.where(np.char.endswith(profesion.astype(str), 'a'), 'Femenino', 'Masculino'),
+        'Fecha Ingreso DT': np.where(hired, ingreso.strftime('%Y-%m-%d'), None),
+        'Dias Cierre': np.where(hired, dias_cierre.astype(float), np.nan),
+    })
+
+    os.makedirs(data_dir, exist_ok=True)
+    conv.to_csv(os.path.join(data_dir, 'conversaciones_completo.csv'), index=False)
+    pipeline.to_csv(os.path.join(data_dir, 'pipeline_completo.csv'), index=False)
+
+def current_rss_mb():
+    """
+    Current resident set size (Linux /proc); falls back to the peak elsewhere.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def random_interaction(at, rng):
+    """
+    Applies one random sidebar change to an AppTest session and reruns it.
+    """
+    sidebar = at.sidebar
+    action = rng.choice(['periodo', 'fechas', 'estado', 'genero', 'contrata'])
+
+    if action == 'fechas' and len(sidebar.date_input) >= 2:
+        lo, hi = sidebar.date_input[0].value, sidebar.date_input[1].value
+        span = max((hi - lo).days, 1)
+        start = lo + timedelta(days=rng.randrange(span))
+        end = start + timedelta(days=rng.randrange(1, span + 1))
+        sidebar.date_input[0].set_value(start)
+        sidebar.date_input[1].set_value(min(end, hi))
+    elif action in ('estado', 'genero', 'contrata'):
+        widget = sidebar.multiselect[['estado', 'genero', 'contrata'].index(action)]
+        options = list(widget.options)
+        k = rng.randint(1, len(options)) if options else 0
+        widget.set_value(rng.sample(options, k))
+    else:
+        current = sidebar.radio[0].value
+        sidebar.radio[0].set_value('Todo' if current == 'Personalizado' else 'Personalizado')
+
+    return at.run()
+
+def run_session(session_id, reruns, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 100003 + session_id)
+    latencies, errors = [], 0
+
+    start = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    latencies.append(time.perf_counter() - start)
+
+    for _ in range(reruns):
+        start = time.perf_counter()
+        try:
+            at = random_interaction(at, rng)
+            if at.exception or at.error:
+                errors += 1
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+def run_size(n_leads, sessions, reruns, seed, timeout):
+    """
+    Runs one load test (all sessions concurrently) for a dataset size.
+    Meant to be executed in a fresh process.
+    """
+    data_dir = tempfile.mkdtemp(prefix=f'dashboard_load_{n_leads}_')
+    generate_dataset(data_dir, n_leads, seed)
+    os.environ['DASHBOARD_DATA_DIR'] = data_dir
+    os.chdir(BASE_DIR)  # app.py loads assets with relative paths
+
+    # AppTest compiles the script on every run; with magic enabled that goes
+    # through ast.parse, which is not thread-safe on some CPython versions.
+    # The real server compiles once per process, so magic is off here.
+    from streamlit import config
+    config.set_option('runner.magicEnabled', False)
+
+    rss_before = current_rss_mb()
+    rss_samples = []
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(0.2):
+            rss_samples.append(current_rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    wall_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda i: run_session(i, reruns, seed, timeout), range(sessions)))
+    finally:
+        wall = time.perf_counter() - wall_start
+        stop.set()
+        sampler.join()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    latencies = np.array([lat for lats, _ in results for lat in lats]) * 1000
+    pct = np.percentile(latencies, [50, 90, 95, 99]) if latencies.size else [np.nan] * 4
+    return {
+        'leads': n_leads,
+        'sessions': sessions,
+        'reruns_per_session': reruns,
+        'total_reruns': int(latencies.size),
+        'errors': int(sum(err for _, err in results)),
+        'latency_ms': {
+            'p50': float(pct[0]), 'p90': float(pct[1]), 'p95': float(pct[2]), 'p99': float(pct[3]),
+            'max': float(latencies.max()) if latencies.size else float('nan'),
+            'mean': float(latencies.mean()) if latencies.size else float('nan'),
+        },
+        'throughput_rps': latencies.size / wall if wall > 0 else 0.0,
+        'wall_s': wall,
+        'rss_mb': {
+            'before': rss_before,
+            'max_sampled': max(rss_samples, default=current_rss_mb()),
+            'peak': peak_rss_mb(),
+        },
+    }
+
+def traced_peak(fn):
+    """
+    Peak allocation (bytes) while running fn(), Python heap plus Arrow buffers.
+    """
+    # Arrow-backed columns (pandas >= 3 strings) bypass tracemalloc; count
+    # them through a fresh proxy pool so its max_memory covers this call only
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+    if pa is not None:
+        base_pool = pa.default_memory_pool()
+        arrow_pool = pa.proxy_memory_pool(base_pool)
+        pa.set_memory_pool(arrow_pool)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if pa is not None:
+            pa.set_memory_pool(base_pool)
+    if pa is not None:
+        # Upper bound: both peaks are added even if they didn't coincide
+        peak += arrow_pool.max_memory()
+    return peak
+
+def measure_rerun_peak(n_leads, seed):
+    """
+    Peak allocation of one rerun of the data path against a shared snapshot,
+    for the full range without profile filters (frames are passed through) and
+    for the last 30 days with one estado (the filtered selection allocates).
+    A copy of the snapshot anywhere on the path shows up as a peak of at least
+    1x the snapshot size. Meant to be executed in a fresh process.
+    """
+    data_dir = tempfile.mkdtemp(prefix=f'dashboard_mem_{n_leads}_')
+    try:
+        generate_dataset(data_dir, n_leads, seed)
+        os.environ['DASHBOARD_DATA_DIR'] = data_dir
+        sys.path.insert(0, BASE_DIR)
+        from components.charts import build_figures
+        from services.metrics import calculate_kpis
+        from services.store import build_snapshot
+        from services.transforms import compute_views, date_range_bounds, filter_data
+
+        snapshot = build_snapshot()
+        snapshot_bytes = int(snapshot.traffic.memory_usage(deep=True).sum() + snapshot.pipeline.memory_usage(deep=True).sum())
+
+        date_min, date_max = snapshot.domains.date_bounds
+        scenarios = {
+            'rango completo': (date_min, date_max, None),
+            'ultimos 30d + estado': (max(date_min, date_max - timedelta(days=29)), date_max, [ESTADOS[0]]),
+        }
+
+        def rerun(start, end, estados):
+            start_ts, end_ts = date_range_bounds(start, end)
+            traffic_f, pipeline_f = filter_data(snapshot.traffic, snapshot.pipeline, start_ts, end_ts, estados)
+            daily_conv, _, _, weekly_df, channel_df = compute_views(traffic_f, pipeline_f, snapshot.conv_channel)
+            kpis = calculate_kpis(pipeline_f, daily_conv)
+            for fig in build_figures(traffic_f, pipeline_f, weekly_df, channel_df, kpis).values():
+                fig.to_json()
+
+        peaks = {}
+        for name, args in scenarios.items():
+            rerun(*args)  # warm-up: imports and plotly validators
+            peaks[name] = traced_peak(lambda: rerun(*args))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    limit = MAX_PEAK_MULTIPLE * snapshot_bytes + PEAK_FLOOR_MB * 1024 * 1024
+    return {
+        'leads': n_leads,
+        'snapshot_mb': snapshot_bytes / 1024 / 1024,
+        'limit_mb': limit / 1024 / 1024,
+        'scenarios': [
+            {
+                'name': name,
+                'peak_mb': peak / 1024 / 1024,
+                'peak_multiple': peak / snapshot_bytes if snapshot_bytes else float('nan'),
+                'ok': peak <= limit,
+            }
+            for name, peak in peaks.items()
+        ],
+    }
+
+def print_report(report):
+    header = f"{'leads':>8} {'sess':>5} {'reruns':>7} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>7} {'rss MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in report['results']:
+        lat = r['latency_ms']
+        print(
+            f"{r['leads']:>8} {r['sessions']:>5} {r['total_reruns']:>7} {r['errors']:>4} "
+            f"{lat['p50']:>8.0f} {lat['p95']:>8.0f} {lat['p99']:>8.0f} "
+            f"{r['throughput_rps']:>7.1f} {r['rss_mb']['peak']:>8.0f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test offline del dashboard con sesiones simuladas.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Cantidad de leads por dataset")
+    parser.add_argument('--sessions', type=int, default=50, help="Sesiones concurrentes")
+    parser.add_argument('--reruns', type=int, default=10, help="Interacciones por sesión")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help="Timeout por rerun (s)")
+    parser.add_argument('--out', help="Ruta del reporte JSON")
+    parser.add_argument('--memory-check', action='store_true', help="Verifica el peak de memoria por rerun")
+    args = parser.parse_args()
+
+    if args.memory_check:
+        failed = False
+        for n_leads in args.sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                r = pool.submit(measure_rerun_peak, n_leads, args.seed).result()
+            for sc in r['scenarios']:
+                failed |= not sc['ok']
+                print(
+                    f"{r['leads']:>8} leads  {sc['name']:<22} snapshot {r['snapshot_mb']:7.1f} MB  peak {sc['peak_mb']:7.1f} MB "
+                    f"({sc['peak_multiple']:.2f}x, limit {r['limit_mb']:.1f} MB)  {'OK' if sc['ok'] else 'FAIL'}"
+                )
+        sys.exit(1 if failed else 0)
+
+    results = []
+    for n_leads in args.sizes:
+        # spawn: every size starts with a clean interpreter (no shared store, honest RSS)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results.append(pool.submit(run_size, n_leads, args.sessions, args.reruns, args.seed, args.timeout).result())
+        print(f"Done {n_leads} leads", file=sys.stderr)
+
+    report = {
+        'generated_at': pd.Timestamp.now().isoformat(),
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'results': results,
+    }
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Sidebar dimensions that get precomputed option lists
+FILTER_DIMENSIONS = ['estado', 'Genero', 'contrata programa']
+
+
+class DomainIndex:
+    """
+    Per-day distinct values of each filter dimension, stored as bitsets
+    (Python ints) over the dimension's category codes.
+    The options for a date range are the OR of the daily bitsets, so the
+    cost depends on the number of days, not on the number of rows.
+    """
+    def __init__(self, days, categories, day_bits, undated_bits, date_bounds):
+        self.days = days                  # sorted datetime64 array of distinct days
+        self.categories = categories      # {dim: [value, ...]} (code = position)
+        self.day_bits = day_bits          # {dim: [bitset per day]}
+        self.undated_bits = undated_bits  # {dim: bitset for rows without date}
+        self.date_bounds = date_bounds    # (min, max) of traffic 'Fecha'
+
+    def options(self, dim, start_ts=None, end_ts=None):
+        """
+        Distinct values of `dim` among rows dated in [start_ts, end_ts] plus undated rows.
+        """
+        if dim not in self.categories:
+            return []
+        lo = 0 if start_ts is None else np.searchsorted(self.days, np.datetime64(start_ts.normalize()), side='left')
+        hi = len(self.days) if end_ts is None else np.searchsorted(self.days, np.datetime64(end_ts), side='right')
+
+        bits = self.undated_bits[dim]
+        for day_bit in self.day_bits[dim][lo:hi]:
+            bits |= day_bit
+        return [value for code, value in enumerate(self.categories[dim]) if bits >> code & 1]
+
+
+def build_domain_index(traffic, pipeline, date_col='fecha agenda', dimensions=FILTER_DIMENSIONS):
+    """
+    Builds the DomainIndex for a snapshot. Runs once per snapshot, off the request path.
+    """
+    if not traffic.empty and 'Fecha' in traffic.columns:
+        date_bounds = (traffic['Fecha'].min(), traffic['Fecha'].max())
+    else:
+        date_bounds = (pd.NaT, pd.NaT)
+
+    if pipeline.empty or date_col not in pipeline.columns:
+        empty = {dim: [] for dim in dimensions}
+        return DomainIndex(np.array([], dtype='datetime64[ns]'), empty, empty, {dim: 0 for dim in dimensions}, date_bounds)
+
+    day = pd.to_datetime(pipeline[date_col], errors='coerce').dt.normalize()
+    days = np.sort(day.dropna().unique())
+    day_codes = np.searchsorted(days, day.to_numpy())
+    dated = day.notna().to_numpy()
+
+    categories, day_bits, undated_bits = {}, {}, {}
+    for dim in dimensions:
+        if dim not in pipeline.columns:
+            categories[dim], day_bits[dim], undated_bits[dim] = [], [0] * len(days), 0
+            continue
+        # Codes follow first appearance, matching the order of unique()
+        codes, uniques = pd.factorize(pipeline[dim], use_na_sentinel=True)
+        categories[dim] = uniques.tolist()
+
+        valid = codes >= 0
+        pairs = pd.DataFrame({'day': day_codes[valid & dated], 'code': codes[valid & dated]}).drop_duplicates()
+        bits = [0] * len(days)
+        for d, c in zip(pairs['day'].to_numpy(), pairs['code'].to_numpy()):
+            bits[d] |= 1 << int(c)
+        day_bits[dim] = bits
+
+        undated = 0
+        for c in np.unique(codes[valid & ~dated]):
+            undated |= 1 << int(c)
+        undated_bits[dim] = undated
+
+    return DomainIndex(days, categories, day_bits, undated_bits, date_bounds)
@@ -2,24 +2,67 @@ import pandas as pd
 import numpy as np
 import os
 
+from services.partitions import read_partitioned
+
 # Define paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), 'Data')
+# DASHBOARD_DATA_DIR lets tools (e.g. load_test.py) point the app at another dataset
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR', os.path.join(os.path.dirname(BASE_DIR), 'Data'))
 
-def load_conversaciones():
+def read_dataset(name, file_name, start=None, end=None):
     """
-    Loads 'conversaciones_completo.csv' from Data folder.
+    Reads a dataset from its month partitions (Data/<name>/), loading only the
+    shards that overlap [start, end], or from the single legacy CSV.
+    Returns None if neither exists. The range is a pruning hint, not a filter.
     """
-    file_path = os.path.join(DATA_DIR, 'conversaciones_completo.csv')
+    df = read_partitioned(DATA_DIR, name, start, end)
+    if df is not None:
+        return df
+    file_path = os.path.join(DATA_DIR, file_name)
     if not os.path.exists(file_path):
+        return None
+    return pd.read_csv(file_path)
+
+def load_conversaciones(start=None, end=None):
+    """
+    Loads 'conversaciones_completo.csv' from Data folder.
+    """
+    df = read_dataset('conversaciones', 'conversaciones_completo.csv', start, end)
+    if df is None:
         return pd.DataFrame(columns=['Fecha', 'Conversaciones Activas'])
         
-    df = pd.read_csv(file_path)
     df['Fecha'] = pd.to_datetime(df['Fecha'])
     df = df.set_index('Fecha').sort_index()
     return df
 
-def load_agendados():
+def standardize_text(series):
+    """
+    Title-cases labels so spellings match (e.g. REFERIDO vs Referido).
+    """
+    series = series.astype(str).str.strip().str.title()
+    # Special case for "Lead Magnet" or acronyms if needed, 
+    # likely Title case is enough: "Lead Magnet", "Cta" -> "Cta" might want "CTA".
+    # For "CTA", title() makes it "Cta". Let's handle generic cases first.
+    
+    # Fix specific acronyms if necessary
+    return series.replace({'Cta': 'CTA', 'Sdr': 'SDR'}, regex=False)
+
+def load_conversaciones_canal(start=None, end=None):
+    """
+    Loads 'conversaciones_canal.csv' (daily active conversations per channel,
+    produced from the raw event logs). Empty if the file doesn't exist.
+    """
+    df = read_dataset('conversaciones_canal', 'conversaciones_canal.csv', start, end)
+    if df is None:
+        return pd.DataFrame(columns=['Fecha', 'medio contacto', 'Conversaciones Activas'])
+        
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    df['medio contacto'] = standardize_text(df['medio contacto'])
+    # Channels that only differed in spelling are merged after standardizing
+    df = df.groupby(['Fecha', 'medio contacto'], as_index=False)['Conversaciones Activas'].sum()
+    return df
+
+def load_agendados(start=None, end=None):
     """
     Loads 'pipeline_completo.csv' and aggregates it to match the expected format for 'load_combined_data'.
     Returns DataFrame indexed by 'Fecha' with columns:
@@ -27,11 +70,10 @@ def load_agendados():
     - Breakdown by status (Empleado, etc.)
     - Breakdown by medium
     """
-    file_path = os.path.join(DATA_DIR, 'pipeline_completo.csv')
-    if not os.path.exists(file_path):
+    df = read_dataset('pipeline', 'pipeline_completo.csv', start, end)
+    if df is None:
         return pd.DataFrame() # Return empty if missing
         
-    df = pd.read_csv(file_path)
     df['fecha agenda'] = pd.to_datetime(df['fecha agenda'])
     
     # 1. Total Agendados per day
@@ -56,12 +98,12 @@ def load_agendados():
     
     return df_agendados
 
-def load_combined_data():
+def load_combined_data(start=None, end=None):
     """
     Loads both sources and joins them.
     """
-    df_conv = load_conversaciones()
-    df_agenda = load_agendados()
+    df_conv = load_conversaciones(start, end)
+    df_agenda = load_agendados(start, end)
     
     # Merge
     df_combined = df_conv.join(df_agenda, how='outer').fillna(0)
@@ -76,16 +118,14 @@ def load_combined_data():
     
     return df_combined
 
-def load_pipeline():
+def load_pipeline(start=None, end=None):
     """
-    Loads the full detailed pipeline.
+    Loads the detailed pipeline (only the partitions overlapping [start, end] if given).
     """
-    file_path = os.path.join(DATA_DIR, 'pipeline_completo.csv')
-    if not os.path.exists(file_path):
+    df = read_dataset('pipeline', 'pipeline_completo.csv', start, end)
+    if df is None:
         return pd.DataFrame()
         
-    df = pd.read_csv(file_path)
-    
     # Ensure types
     if 'fecha agenda' in df.columns:
         df['fecha agenda'] = pd.to_datetime(df['fecha agenda'])
@@ -96,13 +136,7 @@ def load_pipeline():
     text_cols = ['medio contacto', 'estado', 'Genero', 'contrata programa']
     for col in text_cols:
         if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.title()
-            # Special case for "Lead Magnet" or acronyms if needed, 
-            # likely Title case is enough: "Lead Magnet", "Cta" -> "Cta" might want "CTA".
-            # For "CTA", title() makes it "Cta". Let's handle generic cases first.
-            
-            # Fix specific acronyms if necessary
-            df[col] = df[col].replace({'Cta': 'CTA', 'Sdr': 'SDR'}, regex=False)
+            df[col] = standardize_text(df[col])
         
     # If using 'usuario' as index for display
     if 'usuario' in df.columns:
@@ -0,0 +1,162 @@
+"""
+Batch export of pre-rendered dashboard reports for fixed filter presets.
+
+Usage (from the project root):
+    python -m services.export                       # default weekly + monthly presets
+    python -m services.export presets.json --out reports --workers 4
+
+presets.json is a list of objects:
+    {"name": "semana", "start": "2025-11-24", "end": "2025-11-30",
+     "estado": ["Empleado"], "Genero": null, "contrata programa": null}
+Missing or null selections keep every value, like the sidebar defaults.
+"""
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from services.etl import DATA_DIR
+from services.metrics import calculate_kpis
+from services.partitions import dataset_date_bounds
+from services.store import build_snapshot
+from services.transforms import compute_views, date_range_bounds, filter_data
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTS_DIR = os.path.join(os.path.dirname(BASE_DIR), 'reports')
+
+FIGURE_TITLES = {
+    'weekly_evo': "Evolución Semanal (Conversaciones → Cierres)",
+    'channel_eff': "Eficiencia por Canal (Cierre)",
+    'gender_dist': "Distribución por Género",
+    'status_conv': "Tasa de Cierre por Estado Laboral",
+    'contact_vol': "Volumen por Canal: Agendados vs Retirados",
+    'funnel_macro': "Embudo de Conversión Macro",
+    'sankey_flow': "Flujo de Clientes (Sankey)",
+    'daily_conv_rate': "Tasa de Conversión Diaria (%)",
+}
+
+def default_presets(date_bounds):
+    """
+    Last 7 and last 30 days, ending at the latest date with traffic.
+    """
+    end = pd.Timestamp(date_bounds[1]).normalize()
+    return [
+        {'name': 'semanal', 'start': str((end - pd.Timedelta(days=6)).date()), 'end': str(end.date())},
+        {'name': 'mensual', 'start': str((end - pd.Timedelta(days=29)).date()), 'end': str(end.date())},
+    ]
+
+def _to_builtin(value):
+    # numpy scalars -> plain Python for json
+    return value.item() if hasattr(value, 'item') else value
+
+def _json_safe(value):
+    # NaN/inf are not valid JSON (e.g. avg_dias_cierre without closed leads)
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+def render_html(preset, kpis, figures):
+    """
+    Single self-contained HTML page (plotly.js inlined once).
+    """
+    parts = [
+        '<html><head><meta charset="utf-8">',
+        f"<title>Dashboard - Somos Empleables - {preset['name']}</title></head><body>",
+        f"<h1>Dashboard - Somos Empleables ({preset['name']})</h1>",
+        f"<p>Periodo: {preset['start']} → {preset['end']}</p>",
+        '<ul>',
+        f"<li>Conversaciones: {kpis['total_conv_val']:,.0f}</li>",
+        f"<li>Agendados: {kpis['total_agendados_val']:,.0f} ({kpis['rate_conv_agendados']:.1f}% Tasa Conv.)</li>",
+        f"<li>Contratados: {kpis['total_contratados_val']:,.0f} ({kpis['rate_cierre_contratados']:.1f}% Tasa Cierre)</li>",
+        '</ul>',
+    ]
+    include_js = True
+    for key, fig in figures.items():
+        parts.append(f"<h3>{FIGURE_TITLES.get(key, key)}</h3>")
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=include_js))
+        include_js = False
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+def export_preset(preset, out_dir):
+    """
+    Computes KPIs, transforms and figures for one preset and writes them to out_dir/<name>/.
+    Returns the list of written files.
+    """
+    # Imported here so the parent process doesn't need the charting stack
+    from components.charts import build_figures
+
+    # Only the month partitions overlapping the preset are read
+    snapshot = build_snapshot(start=preset['start'], end=preset['end'])
+    start_ts, end_ts = date_range_bounds(preset['start'], preset['end'])
+    traffic_f, pipeline_f = filter_data(
+        snapshot.traffic, snapshot.pipeline, start_ts, end_ts,
+        preset.get('estado'), preset.get('Genero'), preset.get('contrata programa')
+    )
+
+    daily_conv, daily_agendas, daily_hired, weekly_df, channel_df = compute_views(traffic_f, pipeline_f, snapshot.conv_channel)
+    kpis = {k: _to_builtin(v) for k, v in calculate_kpis(pipeline_f, daily_conv).items()}
+    figures = build_figures(traffic_f, pipeline_f, weekly_df, channel_df, kpis)
+
+    preset_dir = os.path.join(out_dir, preset['name'])
+    os.makedirs(preset_dir, exist_ok=True)
+    written = []
+
+    kpis_path = os.path.join(preset_dir, 'kpis.json')
+    with open(kpis_path, 'w', encoding='utf-8') as f:
+        kpis_json = {k: _json_safe(v) for k, v in kpis.items()}
+        json.dump({'preset': preset, 'kpis': kpis_json}, f, ensure_ascii=False, indent=2, default=str, allow_nan=False)
+    written.append(kpis_path)
+
+    for key, fig in figures.items():
+        fig_path = os.path.join(preset_dir, f'{key}.json')
+        with open(fig_path, 'w', encoding='utf-8') as f:
+            f.write(fig.to_json())
+        written.append(fig_path)
+
+    html_path = os.path.join(preset_dir, 'report.html')
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(render_html(preset, kpis, figures))
+    written.append(html_path)
+
+    return written
+
+def export_presets(presets, out_dir=REPORTS_DIR, workers=None):
+    """
+    Exports every preset, spread across a process pool.
+    """
+    names = [p['name'] for p in presets]
+    if len(set(names)) != len(names):
+        raise ValueError("Preset names must be unique")
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(export_preset, presets, [out_dir] * len(presets)))
+
+    manifest = {p['name']: [os.path.relpath(path, out_dir) for path in files] for p, files in zip(presets, results)}
+    with open(os.path.join(out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta reportes estáticos del dashboard por preset de filtros.")
+    parser.add_argument('presets', nargs='?', help="JSON con la lista de presets (por defecto: semanal y mensual)")
+    parser.add_argument('--out', default=REPORTS_DIR, help="Carpeta de salida")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo")
+    args = parser.parse_args()
+
+    if args.presets:
+        with open(args.presets, encoding='utf-8') as f:
+            presets = json.load(f)
+    else:
+        # Partition manifests give the date bounds without reading any data
+        date_bounds = dataset_date_bounds(DATA_DIR, 'conversaciones') or build_snapshot().domains.date_bounds
+        presets = default_presets(date_bounds)
+
+    manifest = export_presets(presets, args.out, args.workers)
+    for name, files in manifest.items():
+        print(f"Saved {name}: {len(files)} files")
+
+if __name__ == "__main__":
+    main()
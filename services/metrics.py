@@ -5,7 +5,7 @@ def calculate_kpis(df_pipeline_filtered, daily_conversations):
     # Calculate Totals for KPIs
     total_conv_val = daily_conversations['Conversaciones Activas'].sum()
     total_agendados_val = len(df_pipeline_filtered) # Use pipeline count for accuracy with filters
-    total_contratados_val = len(df_pipeline_filtered[df_pipeline_filtered['contrata programa'] == 'Sí'])
+    total_contratados_val = int((df_pipeline_filtered['contrata programa'] == 'Sí').sum())
     avg_dias_cierre = df_pipeline_filtered['Dias Cierre'].mean() if not df_pipeline_filtered.empty else 0
 
     # Rates
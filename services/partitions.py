@@ -0,0 +1,142 @@
+"""
+Month-partitioned CSV layout for the ETL outputs.
+
+    Data/<dataset>/2025-10.csv
+    Data/<dataset>/2025-11.csv
+    Data/<dataset>/sin_fecha.csv      rows without date (always loaded)
+    Data/<dataset>/_manifest.json     per-shard metadata
+
+CSV has no footer section, so each shard's metadata (row count, min/max
+dates, distinct dimension values) lives in the manifest, swapped in after the shards.
+Readers use it to load only the shards overlapping a date range.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+MANIFEST_NAME = '_manifest.json'
+UNDATED_SHARD = 'sin_fecha'
+MAX_READ_WORKERS = 8
+TMP_SUFFIX = '.tmp'
+
+
+def write_partitioned(df, data_dir, name, date_col, dimensions=()):
+    """
+    Writes `df` as one CSV per month of `date_col` plus the manifest.
+    Every file is written to a temp name and swapped in with os.replace, so a
+    reader never sees a half-written shard. Shards from a previous run that are
+    no longer produced are removed only once the new manifest is in place.
+    """
+    out_dir = os.path.join(data_dir, name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    months = dates.dt.strftime('%Y-%m').fillna(UNDATED_SHARD)
+
+    shards = []
+    for month, shard in df.groupby(months, sort=True):
+        file_name = f'{month}.csv'
+        _replace_file(os.path.join(out_dir, file_name), lambda f: shard.to_csv(f, index=False))
+        shard_dates = dates.loc[shard.index]
+        shards.append({
+            'file': file_name,
+            'month': None if month == UNDATED_SHARD else month,
+            'rows': len(shard),
+            'min_date': None if shard_dates.isna().all() else str(shard_dates.min().date()),
+            'max_date': None if shard_dates.isna().all() else str(shard_dates.max().date()),
+            'distinct': {
+                dim: sorted(shard[dim].dropna().astype(str).unique().tolist())
+                for dim in dimensions if dim in shard.columns
+            },
+        })
+
+    manifest = {'dataset': name, 'date_col': date_col, 'columns': [str(c) for c in df.columns], 'shards': shards}
+    _replace_file(os.path.join(out_dir, MANIFEST_NAME),
+                  lambda f: json.dump(manifest, f, ensure_ascii=False, indent=2))
+
+    # The old manifest may still be in use until the swap above: stale shards go last
+    current = {s['file'] for s in shards}
+    for file_name in os.listdir(out_dir):
+        stale_shard = file_name.endswith('.csv') and file_name not in current
+        if stale_shard or file_name.endswith(TMP_SUFFIX):
+            os.remove(os.path.join(out_dir, file_name))
+    return manifest
+
+
+def _replace_file(path, write):
+    """
+    Calls write(f) on a temp file next to `path`, then atomically moves it into place.
+    """
+    tmp_path = path + TMP_SUFFIX
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(data_dir, name):
+    """
+    Returns the dataset's manifest, or None if it isn't partitioned.
+    """
+    path = os.path.join(data_dir, name, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def select_shards(manifest, start=None, end=None):
+    """
+    Shards whose [min_date, max_date] overlaps [start, end], plus the undated shard.
+    """
+    start = pd.Timestamp(start).normalize() if start is not None else None
+    end = pd.Timestamp(end).normalize() if end is not None else None
+    selected = []
+    for shard in manifest['shards']:
+        if shard['min_date'] is None:
+            selected.append(shard)
+            continue
+        if start is not None and pd.Timestamp(shard['max_date']) < start:
+            continue
+        if end is not None and pd.Timestamp(shard['min_date']) > end:
+            continue
+        selected.append(shard)
+    return selected
+
+
+def read_partitioned(data_dir, name, start=None, end=None, columns=None):
+    """
+    Reads the shards of `name` overlapping [start, end] in parallel.
+    Returns None if the dataset isn't partitioned (callers fall back to the
+    single CSV). Rows outside the range may be included: pruning is per month.
+    If no shard overlaps, the frame is empty but keeps the dataset's columns.
+    """
+    manifest = read_manifest(data_dir, name)
+    if manifest is None:
+        return None
+
+    shards = select_shards(manifest, start, end)
+    paths = [os.path.join(data_dir, name, s['file']) for s in shards]
+    if not paths:
+        return pd.DataFrame(columns=columns if columns is not None else manifest.get('columns', []))
+
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(paths))) as pool:
+        frames = list(pool.map(lambda path: pd.read_csv(path, usecols=columns), paths))
+    return pd.concat(frames, ignore_index=True)
+
+
+def dataset_date_bounds(data_dir, name):
+    """
+    (min, max) dates of a partitioned dataset from its manifest alone, or None.
+    """
+    manifest = read_manifest(data_dir, name)
+    if manifest is None:
+        return None
+    dated = [s for s in manifest['shards'] if s['min_date'] is not None]
+    if not dated:
+        return None
+    return (
+        min(pd.Timestamp(s['min_date']) for s in dated),
+        max(pd.Timestamp(s['max_date']) for s in dated),
+    )
@@ -1,12 +1,23 @@
 import pandas as pd
 import numpy as np
 import os
+import re
+import glob
+import hashlib
 from datetime import datetime, timedelta
 
+try:
+    from services.partitions import write_partitioned
+except ImportError:
+    # Run as a script from services/ (python process_data.py)
+    from partitions import write_partitioned
+
 # Define paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_OCT_DIR = os.path.join(BASE_DIR, 'Data Oct')
 DATA_OUT_DIR = os.path.join(BASE_DIR, 'Data')
+# Raw conversation event exports from the messaging tool (*.csv / *.csv.gz)
+EVENTS_DIR = os.path.join(BASE_DIR, 'Eventos')
 
 if not os.path.exists(DATA_OUT_DIR):
     os.makedirs(DATA_OUT_DIR)
@@ -40,6 +51,141 @@ def normalize_name(name):
         name_norm = name_norm.replace(a, b)
     return name_norm.lower()
 
+# --- Entity Resolution (lead merge) ---
+# Ordered Spanish phonetic rewrites applied to an already normalized name.
+PHONETIC_RULES = tuple((re.compile(pattern), repl) for pattern, repl in (
+    # Digits stay: "Lead 1" vs "Lead 2" or the sheets' "(2)" second-record marker
+    (r'[^a-zñ0-9 ]', ''),
+    (r'h', ''),
+    (r'qu', 'k'),
+    (r'c([ei])', r's\1'),
+    (r'z', 's'),
+    (r'c', 'k'),
+    (r'g([ei])', r'j\1'),
+    (r'v', 'b'),
+    (r'll', 'y'),
+    (r'([a-zñ])\1+', r'\1'),
+))
+NEIGHBOURHOOD_WINDOW = 4
+
+def phonetic_key(name_norm):
+    """
+    Builds an order-insensitive phonetic key from a normalized name.
+    "Bárbara Gonzáles" and "gonzalez barbara" share the same key.
+    """
+    if not isinstance(name_norm, str):
+        return ''
+    key = name_norm
+    for pattern, repl in PHONETIC_RULES:
+        key = pattern.sub(repl, key)
+    return ' '.join(sorted(key.split()))
+
+def _is_typo(a, b):
+    # Single substitution on reasonably long keys (e.g. "pulgar" vs "pulgat")
+    if len(a) != len(b) or len(a) < 8:
+        return False
+    return sum(x != y for x, y in zip(a, b)) == 1
+
+def build_lead_index(names):
+    """
+    Resolves raw user names into stable lead IDs.
+    Names are blocked on their phonetic key: only exact key matches share an ID,
+    and the ID is derived from that key alone, so it doesn't change when other
+    names show up. Near matches are reported by find_near_duplicates instead.
+    Names with an empty key (e.g. "???") get no ID, so they are never collapsed.
+    Returns a dict {normalized name: lead_id}.
+    """
+    index = {}
+    for name in {normalize_name(n) for n in names if isinstance(n, str)}:
+        key = phonetic_key(name)
+        if key:
+            index[name] = 'L-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+    return index
+
+def find_near_duplicates(keys, window=NEIGHBOURHOOD_WINDOW):
+    """
+    Sorted-neighbourhood pass over phonetic keys: each key is compared only with
+    the next `window` keys, so the cost stays O(n log n) instead of every pair.
+    Returns the (key_a, key_b) pairs that look like typos of each other.
+    """
+    sorted_keys = sorted(set(keys))
+    pairs = []
+    for i, key in enumerate(sorted_keys):
+        for other in sorted_keys[i + 1:i + 1 + window]:
+            if _is_typo(key, other):
+                pairs.append((key, other))
+    return pairs
+
+def assign_lead_ids(df, index):
+    df['lead_id'] = df['usuario'].apply(normalize_name).map(index)
+    return df
+
+def dedupe_leads(df, sort_cols=None, ascending=True, stats=None, label=None):
+    """
+    Keeps one row per lead_id (exact phonetic-key match). Rows are ordered by `sort_cols` (then by the
+    original position) before keeping the first, so the choice is deterministic.
+    If `stats` is given, the number of dropped rows is stored under `label`.
+    """
+    sort_cols = [c for c in (sort_cols or []) if c in df.columns]
+    ordered = df.sort_values(sort_cols, ascending=ascending, kind='stable') if sort_cols else df
+    # Rows without a name have no lead_id and are never collapsed together
+    dup = ordered['lead_id'].notna() & ordered.duplicated(subset=['lead_id'], keep='first')
+    if stats is not None:
+        stats[label] = int(dup.sum())
+    return ordered[~dup].sort_index()
+
+def merge_stats(left, right, label, left_duplicates=0):
+    """
+    Merge-cardinality statistics for a left join of `right` into `left` on lead_id.
+    Unmatched names on both sides that are near phonetic matches are listed as
+    'candidates' for manual review; they are never merged automatically.
+    `left_duplicates` is the number of rows dropped when deduping `left`.
+    """
+    right_ids = set(right['lead_id'].dropna())
+    matched = left['lead_id'].isin(right_ids)
+    unmatched_right = right[~right['lead_id'].isin(set(left['lead_id'].dropna()))]
+    left_names = {phonetic_key(normalize_name(n)): n for n in left.loc[~matched, 'usuario'].dropna()}
+    right_names = {phonetic_key(normalize_name(n)): n for n in unmatched_right['usuario'].dropna()}
+    candidates = []
+    for key_a, key_b in find_near_duplicates(list(left_names) + list(right_names)):
+        if key_a in left_names and key_b in right_names:
+            candidates.append((left_names[key_a], right_names[key_b]))
+        elif key_b in left_names and key_a in right_names:
+            candidates.append((left_names[key_b], right_names[key_a]))
+    stats = {
+        'merge': label,
+        'left_rows': len(left),
+        'left_duplicates': left_duplicates,
+        'right_rows': len(right),
+        'right_duplicates': int(right['lead_id'].duplicated().sum()),
+        'matched': int(matched.sum()),
+        'unmatched_left': int((~matched).sum()),
+        'unmatched_right': len(right_ids - set(left['lead_id'].dropna())),
+        'candidates': candidates,
+    }
+    return stats
+
+def print_merge_stats(stats):
+    for s in stats:
+        print(
+            f"  [{s['merge']}] left={s['left_rows']} dup_left={s['left_duplicates']} right={s['right_rows']} "
+            f"dup_right={s['right_duplicates']} matched={s['matched']} "
+            f"unmatched_left={s['unmatched_left']} unmatched_right={s['unmatched_right']} "
+            f"candidates={len(s['candidates'])}"
+        )
+        for left_name, right_name in s['candidates']:
+            print(f"    candidate: {left_name!r} ~ {right_name!r}")
+
+# Distinct values recorded per shard in the partition manifest
+PIPELINE_DIMENSIONS = ['estado', 'medio contacto', 'Genero', 'contrata programa']
+
+def save_partitioned(df, name, date_col, dimensions=()):
+    """
+    Writes an output as monthly shards under DATA_OUT_DIR/<name>/ (see partitions.py).
+    """
+    manifest = write_partitioned(df, DATA_OUT_DIR, name, date_col, dimensions)
+    print(f"Saved {os.path.join(DATA_OUT_DIR, name)} ({len(manifest['shards'])} shards, {len(df)} rows)")
+
 def process_conversaciones():
     print("Processing Conversaciones...")
     data_points = []
@@ -87,9 +233,127 @@ def process_conversaciones():
     if not df.empty:
         df = df.sort_values('Fecha').drop_duplicates(subset=['Fecha'])
     
-    out_path = os.path.join(DATA_OUT_DIR, 'conversaciones_completo.csv')
-    df.to_csv(out_path, index=False)
-    print(f"Saved {out_path}")
+    save_partitioned(df, 'conversaciones', 'Fecha')
+
+# --- Conversation Events (streaming rollup) ---
+# Column names in the messaging tool export
+EVENT_COLUMNS = {'timestamp': 'timestamp', 'channel': 'channel', 'conversation_id': 'conversation_id'}
+EVENT_CHUNK_SIZE = 200_000
+EVENT_TIMEZONE = 'America/Santiago'
+# Days a late event may arrive after newer ones and still be counted
+LATE_EVENT_WINDOW_DAYS = 2
+
+def find_event_files(events_dir=EVENTS_DIR):
+    """
+    Raw event exports (.csv / .csv.gz) in `events_dir`, sorted by name.
+    """
+    return sorted(glob.glob(os.path.join(events_dir, '*.csv')) + glob.glob(os.path.join(events_dir, '*.csv.gz')))
+
+def iter_event_chunks(paths, chunksize=EVENT_CHUNK_SIZE):
+    """
+    Streams raw event files chunk by chunk (only the three needed columns).
+    """
+    rename = {v: k for k, v in EVENT_COLUMNS.items()}
+    for path in paths:
+        reader = pd.read_csv(path, usecols=list(EVENT_COLUMNS.values()), dtype=str, chunksize=chunksize)
+        for chunk in reader:
+            yield chunk.rename(columns=rename)
+
+# Trailing UTC offset ("Z", "-03:00", "-0400") marks a timezone-aware timestamp
+TZ_OFFSET_RE = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+def parse_event_timestamps(values):
+    """
+    Parses raw timestamps into naive EVENT_TIMEZONE wall-clock times.
+    Values with an offset are parsed as UTC and converted (files spanning a DST
+    change mix -03:00 and -04:00); naive values are already local wall-clock
+    times and are parsed as is. Unparseable values become NaT.
+    """
+    values = values.str.strip()
+    aware = values.str.contains(TZ_OFFSET_RE, regex=True, na=False)
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    if aware.any():
+        ts = pd.to_datetime(values[aware], errors='coerce', format='mixed', utc=True)
+        result[aware] = ts.dt.tz_convert(EVENT_TIMEZONE).dt.tz_localize(None).astype('datetime64[ns]')
+    naive = ~aware & values.notna()
+    if naive.any():
+        result[naive] = pd.to_datetime(values[naive], errors='coerce', format='mixed').astype('datetime64[ns]')
+    return result
+
+def iter_daily_events(chunks):
+    """
+    Maps each chunk to distinct (Fecha, channel, conversation_id) rows,
+    dated in EVENT_TIMEZONE (see parse_event_timestamps).
+    """
+    for chunk in chunks:
+        ts = parse_event_timestamps(chunk['timestamp'])
+        events = pd.DataFrame({
+            'Fecha': ts.dt.normalize(),
+            'channel': chunk['channel'].fillna('Desconocido'),
+            'conversation_id': chunk['conversation_id'],
+        }).dropna(subset=['Fecha', 'conversation_id'])
+        yield events.drop_duplicates()
+
+def rollup_active_conversations(events, window_days=LATE_EVENT_WINDOW_DAYS, stats=None):
+    """
+    Deduplicates conversation ids per day (and per channel) and yields
+    (Fecha, total, {channel: count}) once a day falls out of the window.
+    Only the ids of the last `window_days` days are kept in memory.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('late_events', 0)
+    window = pd.Timedelta(days=window_days)
+    open_days = {}  # Fecha -> (set of ids, {channel: set of ids})
+    latest = None
+    watermark = None  # days before this were already emitted
+
+    def close_days(before):
+        for day in sorted(d for d in open_days if before is None or d < before):
+            ids, by_channel = open_days.pop(day)
+            yield day, len(ids), {ch: len(ch_ids) for ch, ch_ids in by_channel.items()}
+
+    for frame in events:
+        if frame.empty:
+            continue
+        for day, group in frame.groupby('Fecha', sort=True):
+            if watermark is not None and day < watermark:
+                stats['late_events'] += len(group)
+                continue
+            ids, by_channel = open_days.setdefault(day, (set(), {}))
+            ids.update(group['conversation_id'])
+            for channel, channel_group in group.groupby('channel'):
+                by_channel.setdefault(channel, set()).update(channel_group['conversation_id'])
+        chunk_latest = frame['Fecha'].max()
+        latest = chunk_latest if latest is None else max(latest, chunk_latest)
+        watermark = latest - window
+        yield from close_days(watermark)
+    yield from close_days(None)
+
+def process_conversation_events(paths=None, window_days=LATE_EVENT_WINDOW_DAYS):
+    """
+    Builds the 'conversaciones' output (same schema as process_conversaciones)
+    and 'conversaciones_canal' from raw event logs in bounded memory.
+    """
+    print("Processing Conversation Events...")
+    if paths is None:
+        paths = find_event_files()
+
+    stats = {}
+    daily_rows, channel_rows = [], []
+    for day, total, by_channel in rollup_active_conversations(iter_daily_events(iter_event_chunks(paths)), window_days, stats):
+        daily_rows.append({'Fecha': day, 'Conversaciones Activas': total})
+        for channel, count in by_channel.items():
+            channel_rows.append({'Fecha': day, 'medio contacto': channel, 'Conversaciones Activas': count})
+
+    df = pd.DataFrame(daily_rows, columns=['Fecha', 'Conversaciones Activas'])
+    df_channel = pd.DataFrame(channel_rows, columns=['Fecha', 'medio contacto', 'Conversaciones Activas'])
+
+    save_partitioned(df, 'conversaciones', 'Fecha')
+    save_partitioned(df_channel, 'conversaciones_canal', 'Fecha', ['medio contacto'])
+    if stats['late_events']:
+        print(f"  Skipped {stats['late_events']} events older than the {window_days}-day window")
+    return df, df_channel
 
 def process_pipeline():
     print("Processing Pipeline...")
@@ -97,35 +361,49 @@ def process_pipeline():
     agenda_path = os.path.join(DATA_OCT_DIR, 'Seguimiento clientes Octubre - agenda.csv')
     df_oct_agenda = pd.read_csv(agenda_path)
     df_oct_agenda['fecha agenda'] = pd.to_datetime(df_oct_agenda['fecha agenda'], format='%m/%d/%Y')
-    df_oct_agenda['merge_key'] = df_oct_agenda['usuario'].apply(normalize_name)
     
     contratados_path = os.path.join(DATA_OCT_DIR, 'Seguimiento clientes Octubre - contratados.csv')
     df_oct_contratados = pd.read_csv(contratados_path)
     df_oct_contratados['contrata programa'] = 'Sí'
-    df_oct_contratados['merge_key'] = df_oct_contratados['usuario'].apply(normalize_name)
     
     retirados_path = os.path.join(DATA_OCT_DIR, 'Seguimiento clientes Octubre - leads retirados.csv')
     df_oct_retirados = pd.read_csv(retirados_path)
-    df_oct_retirados['merge_key'] = df_oct_retirados['usuario'].apply(normalize_name)
+    
+    nov_path = os.path.join(DATA_OCT_DIR, 'Seguimiento clientes Noviembre - agenda.csv')
+    df_nov = pd.read_csv(nov_path)
+    
+    # Resolve leads once over every source so lead_id is stable across months
+    lead_index = build_lead_index(pd.concat([
+        df_oct_agenda['usuario'], df_oct_contratados['usuario'],
+        df_oct_retirados['usuario'], df_nov['usuario']
+    ]))
+    for df_src in (df_oct_agenda, df_oct_contratados, df_oct_retirados, df_nov):
+        assign_lead_ids(df_src, lead_index)
+    
+    # Dedupe so repeated names can't multiply rows in the merges
+    dedupe_counts = {}
+    df_oct_agenda = dedupe_leads(df_oct_agenda, ['fecha agenda'], stats=dedupe_counts, label='oct agenda')
+    df_oct_contratados_u = dedupe_leads(df_oct_contratados.dropna(subset=['lead_id']))
+    df_oct_retirados_u = dedupe_leads(df_oct_retirados.dropna(subset=['lead_id']))
+    stats = [
+        merge_stats(df_oct_agenda, df_oct_contratados, 'oct agenda <- contratados', dedupe_counts['oct agenda']),
+        merge_stats(df_oct_agenda, df_oct_retirados, 'oct agenda <- retirados', dedupe_counts['oct agenda']),
+    ]
     
     # Merge Oct
     df_oct_pipeline = df_oct_agenda.merge(
-        df_oct_contratados[['merge_key', 'contrata programa', 'Fecha Ingreso']], 
-        on='merge_key', how='left'
+        df_oct_contratados_u[['lead_id', 'contrata programa', 'Fecha Ingreso']], 
+        on='lead_id', how='left'
     ).merge(
-        df_oct_retirados[['merge_key', 'Motivo por el que no continua']], 
-        on='merge_key', how='left'
+        df_oct_retirados_u[['lead_id', 'Motivo por el que no continua']], 
+        on='lead_id', how='left'
     )
-    df_oct_pipeline = df_oct_pipeline.drop(columns=['merge_key'])
     
     # Fill Oct NaNs
     df_oct_pipeline['contrata programa'] = df_oct_pipeline['contrata programa'].fillna('No')
     df_oct_pipeline['Motivo por el que no continua'] = df_oct_pipeline['Motivo por el que no continua'].fillna('-')
     
     # --- 2. Nov Data Preparation ---
-    nov_path = os.path.join(DATA_OCT_DIR, 'Seguimiento clientes Noviembre - agenda.csv')
-    df_nov = pd.read_csv(nov_path)
-    
     # Map Columns
     df_nov = df_nov.rename(columns={
         'fecha': 'fecha agenda',
@@ -139,6 +417,9 @@ def process_pipeline():
     # Logic for Outcomes
     df_nov['contrata programa'] = df_nov['Acción Final'].apply(lambda x: 'Sí' if isinstance(x, str) and 'Contrata' in x else 'No')
     
+    # The outcome lives on each Nov row: keep the hire if any, else the latest row
+    df_nov = dedupe_leads(df_nov, ['contrata programa', 'fecha agenda'], ascending=False, stats=dedupe_counts, label='nov agenda')
+    
     # Logic for Motivo
     # If Motivo Retiro is filled, use it.
     df_nov['Motivo por el que no continua'] = df_nov['Motivo Retiro'].fillna('-')
@@ -150,7 +431,7 @@ def process_pipeline():
     
     # Ensure columns match
     cols_of_interest = [
-        'usuario', 'fecha agenda', 'estado', 'medio contacto', 
+        'lead_id', 'usuario', 'fecha agenda', 'estado', 'medio contacto', 
         'profesión/formación', 'contrata programa', 'Fecha Ingreso', 'Motivo por el que no continua'
     ]
     
@@ -189,10 +470,17 @@ def process_pipeline():
     # Recalculate Dias Cierre
     df_full['Dias Cierre'] = (df_full['Fecha Ingreso DT'] - df_full['fecha agenda']).dt.days
     
-    out_path = os.path.join(DATA_OUT_DIR, 'pipeline_completo.csv')
-    df_full.to_csv(out_path, index=False)
-    print(f"Saved {out_path}")
+    save_partitioned(df_full, 'pipeline', 'fecha agenda', PIPELINE_DIMENSIONS)
+    print("Merge stats:")
+    print_merge_stats(stats)
+    print(f"  [nov agenda] dup={dedupe_counts['nov agenda']}")
+    return stats
 
 if __name__ == "__main__":
-    process_conversaciones()
+    # Raw event logs replace the manually typed weekday counts when available
+    event_files = find_event_files()
+    if event_files:
+        process_conversation_events(event_files)
+    else:
+        process_conversaciones()
     process_pipeline()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Calendar windows (days) for the rolling conversion rates
+ROLLING_WINDOWS = (7, 28)
+# Width of the anomaly band, in standard deviations of the daily rate
+BAND_STD = 2.0
+# Days with data needed in the band window before a band is drawn
+BAND_MIN_PERIODS = 7
+
+INPUT_COLS = ['Conversaciones Activas', 'Agendados']
+STAT_COLS = [
+    'Tasa Conversion 7d', 'Tasa Conversion 28d', 'Media Tasa 7d',
+    'Banda Inferior', 'Banda Superior', 'Anomalia'
+]
+
+
+def compute_rolling_stats(traffic):
+    """
+    Rolling conversion statistics over calendar windows (days without data don't count).
+    - Tasa Conversion 7d/28d: sum(Agendados) / sum(Conversaciones) in the window
+    - Media Tasa 7d: moving average of the daily 'Tasa Conversion'
+    - Banda Inferior/Superior: 28d mean ± BAND_STD std of the daily rate over the
+      previous days (the tested day is excluded), once BAND_MIN_PERIODS days exist
+    - Anomalia: daily rate outside the band
+    Returns a frame with 'Fecha', the input columns and the stat columns.
+    """
+    df = traffic[['Fecha'] + INPUT_COLS].sort_values('Fecha').set_index('Fecha')
+    if df.empty:
+        return pd.DataFrame(columns=['Fecha'] + INPUT_COLS + STAT_COLS).astype({'Fecha': 'datetime64[ns]'})
+
+    conv = df['Conversaciones Activas']
+    agendados = df['Agendados']
+    daily_rate = pd.Series(np.where(conv > 0, agendados / conv * 100, 0), index=df.index)
+
+    stats = df.copy()
+    for days in ROLLING_WINDOWS:
+        conv_sum = conv.rolling(f'{days}D').sum()
+        agendados_sum = agendados.rolling(f'{days}D').sum()
+        stats[f'Tasa Conversion {days}d'] = np.where(conv_sum > 0, agendados_sum / conv_sum * 100, 0)
+
+    stats['Media Tasa 7d'] = daily_rate.rolling('7D').mean()
+    band_window = f'{max(ROLLING_WINDOWS)}D'
+    # shift(1): the band of a day comes from the window ending at the previous day
+    mean = daily_rate.rolling(band_window, min_periods=BAND_MIN_PERIODS).mean().shift(1)
+    std = daily_rate.rolling(band_window, min_periods=BAND_MIN_PERIODS).std().shift(1)
+    stats['Banda Inferior'] = (mean - BAND_STD * std).clip(lower=0)
+    stats['Banda Superior'] = mean + BAND_STD * std
+    stats['Anomalia'] = (daily_rate < stats['Banda Inferior']) | (daily_rate > stats['Banda Superior'])
+
+    return stats.reset_index()
+
+
+def update_rolling_stats(traffic, previous=None):
+    """
+    Incremental version of compute_rolling_stats.
+    Rows of `previous` before the first changed (or appended) day are reused;
+    only the tail from that day on is recomputed, with one window of look-back
+    from the day before it.
+    """
+    if previous is None or previous.empty or traffic.empty:
+        return compute_rolling_stats(traffic)
+
+    new_inputs = traffic[['Fecha'] + INPUT_COLS].sort_values('Fecha').reset_index(drop=True)
+    old_inputs = previous[['Fecha'] + INPUT_COLS].reset_index(drop=True)
+
+    # First position where the history diverges
+    n = min(len(new_inputs), len(old_inputs))
+    same = (new_inputs.iloc[:n].to_numpy() == old_inputs.iloc[:n].to_numpy()).all(axis=1)
+    first_diff = n if same.all() else int(np.argmin(same))
+    if first_diff == len(new_inputs) == len(old_inputs):
+        return previous
+    if first_diff == 0:
+        return compute_rolling_stats(traffic)
+
+    changed_from = new_inputs['Fecha'].iloc[first_diff] if first_diff < len(new_inputs) else None
+    if changed_from is None:
+        # Days were removed at the end: the remaining prefix is still valid
+        return previous.iloc[:first_diff].reset_index(drop=True)
+
+    # The band of the first changed day uses the window ending at the day before it
+    previous_day = new_inputs['Fecha'].iloc[first_diff - 1]
+    lookback = previous_day - pd.Timedelta(days=max(ROLLING_WINDOWS))
+    tail = compute_rolling_stats(new_inputs[new_inputs['Fecha'] > lookback])
+    tail = tail[tail['Fecha'] >= changed_from]
+    return pd.concat([previous.iloc[:first_diff], tail], ignore_index=True)
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from services.domains import build_domain_index
+from services.rolling import ROLLING_WINDOWS, STAT_COLS, update_rolling_stats
+from services.etl import DATA_DIR, load_combined_data, load_conversaciones_canal, load_pipeline
+
+# Snapshot frames are shared by every session, so the data path relies on
+# copy-on-write semantics (always on from pandas 3.0, opt-in on 2.x)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Seconds between checks of the Data folder
+POLL_INTERVAL = 2.0
+
+
+class Snapshot:
+    """
+    Immutable bundle of the frames every session reads.
+    Frames are shared between sessions: consumers must never modify them in place.
+    """
+    def __init__(self, traffic, pipeline, signature, domains=None, conv_channel=None, rolling=None):
+        self.traffic = traffic
+        self.pipeline = pipeline
+        self.domains = domains
+        self.conv_channel = conv_channel
+        self.rolling = rolling
+        self.signature = signature
+        self.loaded_at = time.time()
+
+
+def data_signature(data_dir=DATA_DIR):
+    """
+    Cheap fingerprint of the Data folder and its partition subfolders
+    (relative paths, sizes and mtimes).
+    """
+    if not os.path.isdir(data_dir):
+        return ()
+    entries = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append((os.path.relpath(path, data_dir), stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def build_snapshot(signature=None, previous=None, start=None, end=None):
+    """
+    Loads and prepares all frames off the request path.
+    Rolling statistics are updated incrementally from the `previous` snapshot.
+    With start/end only the overlapping month partitions are read (traffic gets
+    one rolling window of look-back so the rolling stats stay correct).
+    """
+    if signature is None:
+        signature = data_signature()
+    traffic_start = None if start is None else pd.Timestamp(start) - pd.Timedelta(days=max(ROLLING_WINDOWS))
+    traffic = load_combined_data(traffic_start, end).reset_index()
+    traffic['Fecha'] = pd.to_datetime(traffic['Fecha'])
+    rolling = update_rolling_stats(traffic, previous.rolling if previous is not None else None)
+    traffic = traffic.merge(rolling[['Fecha'] + STAT_COLS], on='Fecha', how='left')
+    pipeline = load_pipeline(start, end)
+    domains = build_domain_index(traffic, pipeline)
+    conv_channel = load_conversaciones_canal(start, end)
+    return Snapshot(traffic, pipeline, signature, domains, conv_channel, rolling)
+
+
+class DataStore:
+    """
+    Process-wide holder of the current Snapshot.
+    A daemon thread polls the Data folder and swaps in a freshly built
+    snapshot when it changes; readers just grab the current reference.
+    """
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._snapshot = build_snapshot()
+        self._thread = threading.Thread(target=self._watch, name="data-store-watcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def refresh(self):
+        """
+        Rebuilds the snapshot if the Data folder changed. Returns True on swap.
+        """
+        with self._refresh_lock:
+            signature = data_signature()
+            if signature == self._snapshot.signature:
+                return False
+            try:
+                new_snapshot = build_snapshot(signature, self._snapshot)
+            except Exception as e:
+                # Keep serving the previous snapshot (e.g. file caught mid-write)
+                self.last_error = e
+                return False
+            # Single reference assignment: readers see the old or the new snapshot, never a mix
+            self._snapshot = new_snapshot
+            self.last_error = None
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the process-wide DataStore, creating it on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
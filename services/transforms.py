@@ -1,4 +1,34 @@
 import pandas as pd
+import numpy as np
+
+def date_range_bounds(start_date, end_date):
+    """
+    Converts a (start, end) date selection into inclusive Timestamps.
+    end_ts is set to the very end of end_date (23:59:59.999999).
+    """
+    start_ts = pd.to_datetime(start_date).normalize()
+    end_ts = pd.to_datetime(end_date).normalize() + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+    return start_ts, end_ts
+
+def filter_data(traffic, pipeline, start_ts, end_ts, statuses=None, genders=None, contracts=None):
+    """
+    Filters traffic by 'Fecha' and pipeline by 'fecha agenda' plus estado, Genero and
+    contrata programa (None keeps every value). Pipeline rows without 'fecha agenda'
+    (NaT) are kept. Each frame is indexed once with a combined mask, and the inputs
+    (shared snapshot frames) are never modified.
+    """
+    traffic_f = _select(traffic, (traffic['Fecha'] >= start_ts) & (traffic['Fecha'] <= end_ts))
+    # Sanear columna fecha agenda sin modificar el pipeline compartido
+    fecha_agenda = pd.to_datetime(pipeline['fecha agenda'], errors='coerce')
+    mask = fecha_agenda.isna() | ((fecha_agenda >= start_ts) & (fecha_agenda <= end_ts))
+    for col, selected in (('estado', statuses), ('Genero', genders), ('contrata programa', contracts)):
+        if selected is not None:
+            mask &= pipeline[col].isin(selected)
+    return traffic_f, _select(pipeline, mask)
+
+def _select(df, mask):
+    # Nothing filtered out ("Todo"): hand back the shared frame instead of materializing every row
+    return df if mask.all() else df[mask]
 
 def transform_conversations(df):
     """
@@ -16,13 +46,15 @@ def transform_hired(df, const_date='Fecha Ingreso DT'):
     """
     Groups pipeline data by hire date to count hired candidates.
     """
+    # Only the date column is selected, so the row filter doesn't materialize the other columns
+    hired = df['contrata programa'] == 'Sí'
     if const_date in df.columns:
-        df_hired = df[df['contrata programa'] == 'Sí'].groupby(const_date).size().reset_index(name='Contratados')
+        df_hired = df.loc[hired, [const_date]].groupby(const_date).size().reset_index(name='Contratados')
         df_hired = df_hired.rename(columns={const_date: 'Fecha Ingreso'})
     else:
-        # Fallback if column name differs or needs parsing
-        df['Fecha Ingreso'] = pd.to_datetime(df['Fecha Ingreso'], dayfirst=True, errors='coerce')
-        df_hired = df[df['contrata programa'] == 'Sí'].groupby('Fecha Ingreso').size().reset_index(name='Contratados')
+        # Fallback if column name differs or needs parsing (parsed into a new Series, df is left untouched)
+        fecha_ingreso = pd.to_datetime(df.loc[hired, 'Fecha Ingreso'], dayfirst=True, errors='coerce')
+        df_hired = fecha_ingreso.to_frame('Fecha Ingreso').groupby('Fecha Ingreso').size().reset_index(name='Contratados')
     
     return df_hired.sort_values('Fecha Ingreso')
 
@@ -45,7 +77,7 @@ def group_weekly_metrics(traffic_f, pipeline_f):
     # In 'load_agendados' (etl.py), we merged into traffic. So traffic_f HAS 'Agendados'.
     
     # Resample requires datetime index or on
-    t_df = traffic_f.copy()
+    t_df = traffic_f
     if 'Fecha' in t_df.columns:
         t_df = t_df.set_index('Fecha')
         
@@ -53,18 +85,17 @@ def group_weekly_metrics(traffic_f, pipeline_f):
     
     # 2. Weekly Closures from Pipeline
     # Closures based on 'Fecha Ingreso'
-    p_df = pipeline_f.copy()
     # Ensure Fecha Ingreso is datetime (it might be object if mixed or not parsed yet, though transform_hired handles it)
     # Let's rely on transform_hired logic but adapting for resampling
     
     # We need a dataframe with Fecha Ingreso to resample
     # Let's use 'Fecha Ingreso DT' if available directly
-    date_col = 'Fecha Ingreso DT' if 'Fecha Ingreso DT' in p_df.columns else 'Fecha Ingreso'
-    # Ensure it's datetime
-    p_df[date_col] = pd.to_datetime(p_df[date_col], dayfirst=True, errors='coerce')
+    date_col = 'Fecha Ingreso DT' if 'Fecha Ingreso DT' in pipeline_f.columns else 'Fecha Ingreso'
+    # Ensure it's datetime (new Series, pipeline_f is never modified)
+    fecha_ingreso = pd.to_datetime(pipeline_f[date_col], dayfirst=True, errors='coerce')
     
-    # Filter only hired
-    hired_df = p_df[p_df['contrata programa'] == 'Sí'].copy()
+    # Filter only hired (with a known hire date, resample can't bin NaT-only data)
+    hired_df = fecha_ingreso[(pipeline_f['contrata programa'] == 'Sí') & fecha_ingreso.notna()].to_frame(date_col)
     if not hired_df.empty:
         weekly_hired = hired_df.set_index(date_col).resample('W-MON').size().reset_index(name='Contratados')
         # Rename date col to match 'Fecha' for merge
@@ -78,10 +109,28 @@ def group_weekly_metrics(traffic_f, pipeline_f):
     
     return weekly_combined
 
-def group_channel_conversion(pipeline_f):
+def compute_views(traffic_f, pipeline_f, conv_channel=None):
+    """
+    Runs every transform the dashboard needs for one filter selection.
+    'conv_channel' (per-channel daily conversations) is restricted to the days in traffic_f.
+    Returns (daily_conv, daily_agendas, daily_hired, weekly_df, channel_df).
+    """
+    daily_conv, daily_agendas, daily_hired = group_daily_metrics(traffic_f, pipeline_f)
+    if not traffic_f.empty and not pipeline_f.empty:
+        weekly_df = group_weekly_metrics(traffic_f, pipeline_f)
+        if conv_channel is not None and not conv_channel.empty:
+            conv_channel = conv_channel[conv_channel['Fecha'].isin(traffic_f['Fecha'])]
+        channel_df = group_channel_conversion(pipeline_f, conv_channel)
+    else:
+        weekly_df = pd.DataFrame()
+        channel_df = pd.DataFrame()
+    return daily_conv, daily_agendas, daily_hired, weekly_df, channel_df
+
+def group_channel_conversion(pipeline_f, conv_channel=None):
     """
     Calculates conversion rates (Agendados -> Cierre) by Channel.
-    Since we don't have source 'Conversaciones' by channel, we assume Pipeline entry = Agenda (or intended agenda).
+    Pipeline entry = Agenda (or intended agenda). When 'conv_channel' (conversations
+    per channel from the event logs) is given, also adds Conversaciones -> Agendados.
     """
     # Group by Medio
     # Count Total (Agendas)
@@ -93,6 +142,16 @@ def group_channel_conversion(pipeline_f):
     ).reset_index()
     
     summary['Tasa Cierre'] = (summary['Contratados'] / summary['Agendados'] * 100).fillna(0)
+
+    if conv_channel is not None and not conv_channel.empty:
+        conv_totals = conv_channel.groupby('medio contacto')['Conversaciones Activas'].sum().rename('Conversaciones')
+        summary = summary.merge(conv_totals, left_on='medio contacto', right_index=True, how='left')
+        summary['Conversaciones'] = summary['Conversaciones'].fillna(0)
+        summary['Tasa Conversion'] = np.where(
+            summary['Conversaciones'] > 0,
+            summary['Agendados'] / summary['Conversaciones'] * 100,
+            0
+        )
     summary = summary.sort_values('Tasa Cierre', ascending=False)
     
     return summary
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from services.process_data import (
+    EVENT_COLUMNS, iter_daily_events, iter_event_chunks, parse_event_timestamps,
+    rollup_active_conversations,
+)
+
+
+def test_parse_event_timestamps_mixed_offsets_and_naive():
+    values = pd.Series([
+        '2025-04-05T23:30:00-03:00',
+        '2025-04-06T02:30:00-04:00',
+        '2025-04-06 03:10:00Z',
+        '2025-04-05 23:30:00',
+        'no es fecha',
+        None,
+    ])
+    parsed = parse_event_timestamps(values)
+    expected = pd.Series(pd.to_datetime([
+        '2025-04-05 23:30:00', '2025-04-06 02:30:00', '2025-04-05 23:10:00',
+        '2025-04-05 23:30:00', None, None,
+    ]), dtype='datetime64[ns]')
+    pd.testing.assert_series_equal(parsed, expected)
+
+
+def test_rollup_across_dst_change(tmp_path):
+    # Chile leaves DST on 2025-04-06 00:00 (-03:00 -> -04:00)
+    rows = [
+        ('2025-04-05T10:00:00-03:00', 'WhatsApp', 'c1'),
+        ('2025-04-05 23:30:00', 'WhatsApp', 'c2'),
+        ('2025-04-06 03:10:00Z', 'Instagram', 'c3'),      # 23:10 -04:00, still Apr 5
+        ('2025-04-06T09:00:00-04:00', 'WhatsApp', 'c1'),
+        ('2025-04-06T04:00:00+0000', 'Instagram', 'c4'),  # 00:00 -04:00, Apr 6
+        ('2025-04-07 08:00:00', 'WhatsApp', 'c4'),
+    ]
+    path = tmp_path / 'eventos_dst.csv'
+    pd.DataFrame(rows, columns=list(EVENT_COLUMNS.values())).to_csv(path, index=False)
+
+    counts = {
+        day: total
+        for day, total, _ in rollup_active_conversations(iter_daily_events(iter_event_chunks([str(path)])))
+    }
+    assert counts == {
+        pd.Timestamp('2025-04-05'): 3,
+        pd.Timestamp('2025-04-06'): 2,
+        pd.Timestamp('2025-04-07'): 1,
+    }